@@ -0,0 +1,58 @@
+"""
+Builds the optional compiled evaluate kernel (src/_problem_c.pyx):
+
+    pip install cython
+    python setup.py build_ext --inplace
+
+Without it, CloudletProblem uses its NumPy implementation. OpenMP is used when
+the compiler supports it; otherwise the kernel is built single-threaded.
+"""
+import os
+import tempfile
+
+from setuptools import setup, Extension
+from setuptools.command.build_ext import build_ext
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # the kernel is optional
+    cythonize = None
+
+
+def openmp_flags(compiler):
+    """
+    (compile_args, link_args) enabling OpenMP for this compiler, or ([], []) if unsupported.
+    """
+    if compiler.compiler_type == "msvc":
+        return ["/openmp"], []
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "omp_check.c")
+        with open(src, "w") as f:
+            f.write("#include <omp.h>\nint main(void) { return omp_get_max_threads() > 0 ? 0 : 1; }\n")
+        try:
+            objs = compiler.compile([src], output_dir=tmp, extra_postargs=["-fopenmp"])
+            compiler.link_executable(objs, os.path.join(tmp, "omp_check"), extra_postargs=["-fopenmp"])
+        except Exception:
+            return [], []
+    return ["-fopenmp"], ["-fopenmp"]
+
+
+class BuildExt(build_ext):
+    def build_extensions(self):
+        compile_args, link_args = openmp_flags(self.compiler)
+        if not compile_args:
+            print("OpenMP not available for this compiler; building the kernel single-threaded")
+        opt = ["/O2"] if self.compiler.compiler_type == "msvc" else ["-O3"]
+        for ext in self.extensions:
+            ext.extra_compile_args = opt + compile_args
+            ext.extra_link_args = link_args
+        super().build_extensions()
+
+
+if cythonize is None:
+    print("Cython not installed: skipping the optional compiled kernel (pip install cython)")
+    ext_modules = []
+else:
+    ext_modules = cythonize([Extension("src._problem_c", ["src/_problem_c.pyx"])])
+
+setup(name="cloudlet_ffpso", ext_modules=ext_modules, cmdclass={"build_ext": BuildExt})
@@ -0,0 +1,66 @@
+"""
+Whole-array move operators for the hybrid algorithm.
+
+All kernels work in place on the particle's integer arrays:
+- place: int array length P (0 no cloudlet, otherwise 1..T)
+- assign: int array length E (0..P-1)
+
+Each per-element coin flip of the discrete operators is drawn as one random
+vector and applied as a boolean mask, so a move costs a handful of NumPy calls
+instead of one Python iteration per location/device. Random numbers come from
+the caller's np.random.Generator, drawn in one block per move where possible.
+"""
+
+import numpy as np
+
+
+def _toggle_or_retype(place, mask, T, rng):
+    """
+    Where mask is set: place a random type on empty locations, otherwise
+    remove the cloudlet or change its type with equal probability.
+    """
+    P = len(place)
+    new_types = rng.integers(1, T + 1, size=P)
+    changed = np.where(place == 0, new_types, np.where(rng.random(P) < 0.5, 0, new_types))
+    place[mask] = changed[mask]
+
+
+def pso_move(place, assign, pbest_place, pbest_assign, gplace, gassign, P, E, T, rng):
+    r_place = rng.random((3, P))
+    r_assign = rng.random((3, E))
+
+    # Update place: for each location possibly adopt pbest/gbest choice
+    mask = r_place[0] < 0.3
+    place[mask] = pbest_place[mask]
+    mask = r_place[1] < 0.2
+    place[mask] = gplace[mask]
+
+    # small chance to randomly toggle placement or change type
+    _toggle_or_retype(place, r_place[2] < 0.05, T, rng)
+
+    # Update assignment: for each device move to pbest/gbest with some probability
+    mask = r_assign[0] < 0.35
+    assign[mask] = pbest_assign[mask]
+    mask = r_assign[1] < 0.25
+    assign[mask] = gassign[mask]
+    # random jump
+    mask = r_assign[2] < 0.02
+    assign[mask] = rng.integers(0, P, size=int(mask.sum()))
+
+
+def firefly_move(place_i, assign_i, place_j, assign_j, P, E, rng):
+    # placements: adopt some positions and types from brighter j
+    adopt = (place_j != place_i) & (rng.random(P) < 0.5)
+    place_i[adopt] = place_j[adopt]
+
+    # assignments: adopt some assignments
+    adopt = (assign_j != assign_i) & (rng.random(E) < 0.4)
+    assign_i[adopt] = assign_j[adopt]
+
+
+def mutate(place, assign, P, E, T, pm_place, pm_assign, rng):
+    # placements random mutation
+    _toggle_or_retype(place, rng.random(P) < pm_place, T, rng)
+    # assignments mutation
+    mask = rng.random(E) < pm_assign
+    assign[mask] = rng.integers(0, P, size=int(mask.sum()))
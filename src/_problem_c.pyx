@@ -0,0 +1,80 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Compiled batch objective kernel for CloudletProblem.evaluate_batch.
+
+Build in place with:  python setup.py build_ext --inplace
+When the extension is not built, CloudletProblem falls back to its NumPy path;
+both compute the same placement cost, latency and penalty (placement cost may
+differ in the last bits, since the sums are accumulated in a different order).
+
+Rows (solutions) are independent, so they are spread over OpenMP threads, each
+accumulating capacity usage in its own scratch row (no atomics needed).
+"""
+
+from cython.parallel import prange
+from libc.stdint cimport int64_t
+
+
+def evaluate_c(const int64_t[:, ::1] place, const int64_t[:, ::1] assign, const float[:, ::1] dist,
+               const double[:, ::1] dem, const int[::1] type_CPU, const int[::1] type_MEM,
+               const int[::1] type_STO, const float[::1] type_R, const double[:, ::1] placement_cost,
+               double[:, :, ::1] used, double[:, ::1] out):
+    """
+    place (n,P), assign (n,E), dem (3,E) cpu/mem/sto demands, used (n,3,P) scratch.
+    Writes out[i] = (placement_cost, latency, penalty) for each row i.
+    """
+    cdef Py_ssize_t n = place.shape[0]
+    cdef Py_ssize_t P = place.shape[1]
+    cdef Py_ssize_t E = assign.shape[1]
+    cdef Py_ssize_t i, e, p
+    cdef int64_t a, c
+    cdef double cost, lat, penalty, over
+    cdef float d
+
+    for i in prange(n, nogil=True, schedule='static'):
+        cost = 0.0
+        lat = 0.0
+        penalty = 0.0
+        for p in range(P):
+            used[i, 0, p] = 0.0
+            used[i, 1, p] = 0.0
+            used[i, 2, p] = 0.0
+            c = place[i, p]
+            if c > 0:
+                cost = cost + placement_cost[c - 1, p]
+
+        # latency, coverage and per-location usage in one pass over devices
+        for e in range(E):
+            a = assign[i, e]
+            if a < 0 or a >= P:
+                lat = lat + 1e6
+                penalty = penalty + 1e5
+                continue
+            d = dist[e, a]
+            lat = lat + d
+            c = place[i, a]
+            if c == 0 or d > type_R[c]:
+                penalty = penalty + 1e5
+            used[i, 0, a] += dem[0, e]
+            used[i, 1, a] += dem[1, e]
+            used[i, 2, a] += dem[2, e]
+
+        # capacity
+        for p in range(P):
+            c = place[i, p]
+            if c == 0:
+                if used[i, 0, p] + used[i, 1, p] + used[i, 2, p] > 0:
+                    penalty = penalty + 1e6
+            else:
+                over = 0.0
+                if used[i, 0, p] > type_CPU[c]:
+                    over = over + used[i, 0, p] - type_CPU[c]
+                if used[i, 1, p] > type_MEM[c]:
+                    over = over + used[i, 1, p] - type_MEM[c]
+                if used[i, 2, p] > type_STO[c]:
+                    over = over + used[i, 2, p] - type_STO[c]
+                penalty = penalty + 1e4 * over
+
+        out[i, 0] = cost
+        out[i, 1] = lat
+        out[i, 2] = penalty
@@ -18,23 +18,40 @@ Algorithm outline:
     - Non-dominated sorting not used here; we keep scalar fitness to guide moves
     - For each particle:
         - PSO update: move towards personal best and global best using discrete operators
-        - Firefly step: move towards brighter fireflies by mixing assignments & placements
+        - Firefly step: move towards the (top-k) brighter fireflies by mixing assignments & placements
         - Mutation: random changes
         - Repair
 - Keep track of best found (Pareto front approximated by storing nondominated seen)
 """
 
+import os
+import numbers
 import numpy as np
-import random
-from copy import deepcopy
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import trange
 
 from src.utils import one_point_crossover, uniform_crossover
+from src import _kernels
+
+# Worker-side state for the optional process pool: the problem is sent once per
+# worker by the initializer instead of being pickled with every task.
+_worker_problem = None
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+def _repair_one(seed, place_loc, assign_dev):
+    # each task gets its own seed so workers do not share a random stream
+    return _worker_problem.repair_solution(place_loc, assign_dev, np.random.default_rng(seed))
 
 class Particle:
     def __init__(self, place_loc, assign_dev):
-        self.place_loc = place_loc.copy()
-        self.assign_dev = assign_dev.copy()
+        # current solution is stored by reference: HybridFFPSO passes row views of its
+        # population arrays and updates them in place
+        self.place_loc = place_loc
+        self.assign_dev = assign_dev
         # velocities: for discrete representation keep probability matrices
         self.v_place = np.zeros_like(place_loc, dtype=float)  # not heavily used here
         self.v_assign = np.zeros_like(assign_dev, dtype=float)
@@ -43,56 +60,121 @@ class Particle:
         self.pbest_score = np.inf
 
 class HybridFFPSO:
-    def __init__(self, problem, pop_size=40, max_iter=300, seed=42):
+    def __init__(self, problem, pop_size=40, max_iter=300, seed=42, n_jobs=1, firefly_k=3):
+        """
+        n_jobs: worker processes used to repair the population during run()
+                (1 = serial, -1 = all CPUs). Meant for large instances, where per-particle
+                repair outweighs shipping the solutions to the workers; evaluation is a
+                single batched call and always stays in this process. Each particle is
+                repaired with its own seed drawn from the run's generator, so results for
+                a given seed do not depend on n_jobs.
+        firefly_k: each firefly moves towards at most this many of the brightest particles
+                   that outshine it (None = all brighter particles).
+        """
         self.problem = problem
         self.pop_size = pop_size
         self.max_iter = max_iter
-        random.seed(seed)
-        np.random.seed(seed)
+        if firefly_k is not None and (not isinstance(firefly_k, numbers.Integral)
+                                      or isinstance(firefly_k, bool) or firefly_k < 1):
+            raise ValueError(f"firefly_k must be None or a positive integer, got {firefly_k!r}")
+        self.firefly_k = pop_size if firefly_k is None else int(firefly_k)
+        if (not isinstance(n_jobs, numbers.Integral) or isinstance(n_jobs, bool)
+                or not (n_jobs == -1 or n_jobs >= 1)):
+            raise ValueError(f"n_jobs must be -1 or a positive integer, got {n_jobs!r}")
+        # os.cpu_count() is None when the CPU count cannot be determined
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else int(n_jobs)
+        self._pool = None
+        # single random generator for initialization, moves and repair
+        self.rng = np.random.default_rng(seed)
 
+        # current solutions of all particles, one row each (Particle fields are row views)
+        self.pop_place = np.zeros((pop_size, problem.P), dtype=int)
+        self.pop_assign = np.zeros((pop_size, problem.E), dtype=int)
         self.population = []
-        for _ in range(pop_size):
-            p_loc, a_dev = problem.random_solution()
-            part = Particle(p_loc, a_dev)
+        for i in range(pop_size):
+            self.pop_place[i], self.pop_assign[i] = problem.random_solution(rng=self.rng)
+            part = Particle(self.pop_place[i], self.pop_assign[i])
             self.population.append(part)
 
         self.global_best = None
         self.global_best_score = np.inf
-        self.archive = []  # store nondominated solutions (simple list of dicts)
+        self.archive = []  # store nondominated solutions (list of dicts sorted by placement cost)
+        # parallel objective lists; on a 2-objective front latency decreases as cost increases
+        self._arch_cost = []
+        self._arch_lat = []
 
     def evaluate_population(self):
-        evals = []
-        for part in self.population:
-            r = self.problem.evaluate(part.place_loc, part.assign_dev)
-            evals.append(r)
-        return evals
+        """
+        Evaluate all particles in one batched pass.
+        Returns dict of arrays (pop_size,) with the same keys as CloudletProblem.evaluate.
+        """
+        return self.problem.evaluate_batch(self.pop_place, self.pop_assign)
+
+    def repair_population(self):
+        """
+        Repair every particle's current solution in place.
+        """
+        # one seed per particle in both paths (see n_jobs in __init__)
+        seeds = self.rng.integers(0, 2**63 - 1, size=self.pop_size)
+        if self._pool is None:
+            for seed, part in zip(seeds, self.population):
+                rng = np.random.default_rng(seed)
+                part.place_loc[:], part.assign_dev[:] = self.problem.repair_solution(part.place_loc, part.assign_dev, rng)
+            return
+        chunksize = max(1, self.pop_size // self.n_jobs)
+        repaired = self._pool.map(_repair_one, seeds, self.pop_place, self.pop_assign, chunksize=chunksize)
+        for i, (place_loc, assign_dev) in enumerate(repaired):
+            self.pop_place[i] = place_loc
+            self.pop_assign[i] = assign_dev
+
+    def dominated_by_archive(self, cost, lat):
+        """
+        Vectorized dominance test of candidate objective arrays against the archive.
+        Returns bool array: True where some archive entry dominates the candidate.
+        """
+        cost = np.asarray(cost, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        if not self.archive:
+            return np.zeros(cost.shape, dtype=bool)
+        costs = np.asarray(self._arch_cost)
+        lats = np.asarray(self._arch_lat)
+        # lowest-latency entry with cost <= candidate cost (same rule as the update)
+        k = np.searchsorted(costs, cost, side='right') - 1
+        kc = costs[np.maximum(k, 0)]
+        kl = lats[np.maximum(k, 0)]
+        return (k >= 0) & (kl <= lat) & ((kc < cost) | (kl < lat))
 
     def nondominated_archive_update(self, sol, metrics):
         """
         Keep a simple archive of nondominated solutions (w.r.t two objectives: cost & latency).
         metrics: dict with 'placement_cost','latency','penalty','fitness'
+        The archive is kept sorted by cost, so with two objectives only the entry just
+        below the new cost can dominate it (found by bisection), and the entries it
+        dominates form a contiguous run starting at its cost (start found by bisection,
+        end by scanning while latency stays >= the new latency).
         """
-        # if dominated by any in archive -> ignore
-        dominated = False
-        removals = []
-        for i,entry in enumerate(self.archive):
-            m = entry['metrics']
-            # entry dominates sol?
-            if (m['placement_cost'] <= metrics['placement_cost'] and
-                m['latency'] <= metrics['latency'] and
-                (m['placement_cost'] < metrics['placement_cost'] or m['latency'] < metrics['latency'])):
-                dominated = True
-                break
-            # sol dominates entry?
-            if (metrics['placement_cost'] <= m['placement_cost'] and
-                metrics['latency'] <= m['latency'] and
-                (metrics['placement_cost'] < m['placement_cost'] or metrics['latency'] < m['latency'])):
-                removals.append(i)
-        if not dominated:
-            # remove dominated entries
-            for idx in sorted(removals, reverse=True):
-                self.archive.pop(idx)
-            self.archive.append({'place_loc': sol['place_loc'].copy(), 'assign_dev': sol['assign_dev'].copy(), 'metrics': metrics.copy()})
+        cost = metrics['placement_cost']
+        lat = metrics['latency']
+        costs = self._arch_cost
+        lats = self._arch_lat
+
+        # dominated by the lowest-latency entry with cost <= new cost -> ignore
+        k = bisect_right(costs, cost) - 1
+        if k >= 0 and lats[k] <= lat:
+            if costs[k] < cost or lats[k] < lat:
+                return
+            # identical objectives: keep both, nothing else can be dominated
+            start = stop = k + 1
+        else:
+            # remove entries with cost >= new cost and latency >= new latency
+            start = stop = bisect_left(costs, cost)
+            while stop < len(costs) and lats[stop] >= lat:
+                stop += 1
+
+        entry = {'place_loc': sol['place_loc'].copy(), 'assign_dev': sol['assign_dev'].copy(), 'metrics': metrics.copy()}
+        self.archive[start:stop] = [entry]
+        costs[start:stop] = [cost]
+        lats[start:stop] = [lat]
 
     def local_pso_move(self, part, w=0.7, c1=1.2, c2=1.2):
         """
@@ -104,110 +186,76 @@ class HybridFFPSO:
         g_place = self.global_best['place_loc'] if self.global_best is not None else part.pbest_place
         g_assign = self.global_best['assign_dev'] if self.global_best is not None else part.pbest_assign
 
-        P = self.problem.P
-        E = self.problem.E
-
-        # Update place_loc: for each location possibly adopt pbest/gbest choice
-        for p in range(P):
-            if random.random() < 0.3:
-                part.place_loc[p] = part.pbest_place[p]
-            if random.random() < 0.2:
-                part.place_loc[p] = g_place[p]
-
-            # small chance to randomly toggle placement or change type
-            if random.random() < 0.05:
-                if part.place_loc[p] == 0:
-                    part.place_loc[p] = random.randint(1, self.problem.T)
-                else:
-                    if random.random() < 0.5:
-                        part.place_loc[p] = 0
-                    else:
-                        part.place_loc[p] = random.randint(1, self.problem.T)
-
-        # Update assignment: for each device move to pbest/gbest with some probability
-        for e in range(E):
-            if random.random() < 0.35:
-                part.assign_dev[e] = part.pbest_assign[e]
-            if random.random() < 0.25:
-                part.assign_dev[e] = g_assign[e]
-            # random jump
-            if random.random() < 0.02:
-                part.assign_dev[e] = random.randint(0, self.problem.P-1)
+        _kernels.pso_move(part.place_loc, part.assign_dev, part.pbest_place, part.pbest_assign,
+                          g_place, g_assign, self.problem.P, self.problem.E, self.problem.T, self.rng)
 
     def firefly_move(self, part, brighter_part, beta0=0.8, gamma=1.0):
         """
         Move this particle towards a brighter particle by mixing placements and assignments.
         The intensity of move depends on difference between solutions (hamming).
         """
-        P = self.problem.P
-        E = self.problem.E
-
-        # placements: adopt some positions and types from brighter
-        for p in range(P):
-            if brighter_part.place_loc[p] != part.place_loc[p]:
-                if random.random() < 0.5:
-                    part.place_loc[p] = brighter_part.place_loc[p]
-
-        # assignments: adopt some assignments
-        for e in range(E):
-            if brighter_part.assign_dev[e] != part.assign_dev[e]:
-                # probability proportional to difference
-                if random.random() < 0.4:
-                    part.assign_dev[e] = brighter_part.assign_dev[e]
+        _kernels.firefly_move(part.place_loc, part.assign_dev, brighter_part.place_loc, brighter_part.assign_dev,
+                              self.problem.P, self.problem.E, self.rng)
 
     def mutate(self, part, pm_place=0.02, pm_assign=0.03):
-        # placements random mutation
-        for p in range(self.problem.P):
-            if random.random() < pm_place:
-                if part.place_loc[p] == 0:
-                    part.place_loc[p] = random.randint(1, self.problem.T)
-                else:
-                    if random.random() < 0.5:
-                        part.place_loc[p] = 0
-                    else:
-                        part.place_loc[p] = random.randint(1, self.problem.T)
-        # assignments mutation
-        for e in range(self.problem.E):
-            if random.random() < pm_assign:
-                part.assign_dev[e] = random.randint(0, self.problem.P-1)
+        _kernels.mutate(part.place_loc, part.assign_dev, self.problem.P, self.problem.E, self.problem.T,
+                        pm_place, pm_assign, self.rng)
 
     def run(self, verbose=True):
+        if self.n_jobs > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                             initargs=(self.problem,))
+        try:
+            return self._run(verbose)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(self, verbose):
         best_history = []
         for it in trange(self.max_iter, desc="Iter"):
             # Evaluate population
             evals = self.evaluate_population()
+            fitness = evals['fitness']
             # update personal best and global best
+            # candidates already dominated by the archive stay dominated while it is updated
+            dominated = self.dominated_by_archive(evals['placement_cost'], evals['latency'])
             for i, part in enumerate(self.population):
-                metrics = evals[i]
-                if metrics['fitness'] < part.pbest_score:
-                    part.pbest_score = metrics['fitness']
-                    part.pbest_place = part.place_loc.copy()
-                    part.pbest_assign = part.assign_dev.copy()
+                if fitness[i] < part.pbest_score:
+                    part.pbest_score = fitness[i]
+                    np.copyto(part.pbest_place, part.place_loc)
+                    np.copyto(part.pbest_assign, part.assign_dev)
                 # update global
-                if metrics['fitness'] < self.global_best_score:
-                    self.global_best_score = metrics['fitness']
-                    self.global_best = {'place_loc': part.place_loc.copy(), 'assign_dev': part.assign_dev.copy()}
+                if fitness[i] < self.global_best_score:
+                    self.global_best_score = fitness[i]
+                    if self.global_best is None:
+                        self.global_best = {'place_loc': part.place_loc.copy(), 'assign_dev': part.assign_dev.copy()}
+                    else:
+                        np.copyto(self.global_best['place_loc'], part.place_loc)
+                        np.copyto(self.global_best['assign_dev'], part.assign_dev)
                 # update archive nondominated
-                sol = {'place_loc': part.place_loc, 'assign_dev': part.assign_dev}
-                self.nondominated_archive_update(sol, metrics)
+                if not dominated[i]:
+                    metrics = {k: float(v[i]) for k, v in evals.items()}
+                    sol = {'place_loc': part.place_loc, 'assign_dev': part.assign_dev}
+                    self.nondominated_archive_update(sol, metrics)
 
             # Sort by brightness (fitness)
-            sorted_idx = sorted(range(len(self.population)), key=lambda i: evals[i]['fitness'])
-            # Firefly interactions: for each (i) try to move towards brighter (j) with j<i
+            sorted_idx = np.argsort(fitness, kind='stable')
+            sorted_fit = fitness[sorted_idx]
+            # number of strictly brighter (lower fitness) particles ahead of each sorted position
+            n_brighter = np.searchsorted(sorted_fit, sorted_fit, side='left')
+            # Firefly interactions: for each (i) move towards the k brightest (j) with j<i
             for ii in range(len(self.population)):
                 i = sorted_idx[ii]
-                for jj in range(ii):
-                    j = sorted_idx[jj]
-                    # if j is brighter (lower fitness)
-                    if evals[j]['fitness'] < evals[i]['fitness']:
-                        self.firefly_move(self.population[i], self.population[j])
+                for j in sorted_idx[:min(n_brighter[ii], self.firefly_k)]:
+                    self.firefly_move(self.population[i], self.population[j])
 
             # PSO moves + mutation + repair
             for part in self.population:
                 self.local_pso_move(part)
                 self.mutate(part)
-                # repair
-                part.place_loc, part.assign_dev = self.problem.repair_solution(part.place_loc, part.assign_dev)
+            self.repair_population()
 
             # record best metrics
             best_history.append(self.global_best_score)
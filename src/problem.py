@@ -14,6 +14,11 @@ Note: A device assigned to p must have place_loc[p] != 0 and distance <= radius
 
 import numpy as np
 
+try:
+    from src._problem_c import evaluate_c
+except ImportError:  # compiled kernel not built (see setup.py); use the NumPy path
+    evaluate_c = None
+
 class CloudletProblem:
     def __init__(self, instance):
         self.locations = instance['locations']            # (P,2)
@@ -26,10 +31,41 @@ class CloudletProblem:
         self.E = len(self.devices)
         self.T = len(self.cloudlet_types)
 
-        # Precompute distances device->location
+        # Precompute distances device->location (float32 halves the bytes per gather)
         dev = np.array(self.devices)
         loc = np.array(self.locations)
-        self.dist = np.linalg.norm(dev[:, None, :] - loc[None, :, :], axis=2)  # (E,P)
+        dist = np.linalg.norm(dev[:, None, :] - loc[None, :, :], axis=2)
+        self.dist = np.ascontiguousarray(dist, dtype=np.float32)  # (E,P)
+        self.nearest_loc = np.argmin(self.dist, axis=1)          # (E,)
+        self.nearest_dist = self.dist[np.arange(self.E), self.nearest_loc]  # (E,)
+
+        # Device demands as parallel arrays (E,)
+        self.cpu_dem = np.array([d['cpu'] for d in self.demands], dtype=np.int32)
+        self.mem_dem = np.array([d['mem'] for d in self.demands], dtype=np.int32)
+        self.sto_dem = np.array([d['sto'] for d in self.demands], dtype=np.int32)
+        # float copies (3,E) used as bincount weights, so capacity sums skip the int->float cast
+        self._dem_weights = np.stack([self.cpu_dem, self.mem_dem, self.sto_dem]).astype(float)
+
+        # Cloudlet type attributes as parallel arrays (T+1,); row 0 = "no cloudlet"
+        # so a placement vector indexes them directly, e.g. self.type_R[place_loc]
+        types = self.cloudlet_types
+        self.type_CPU = np.array([0] + [t['CPU'] for t in types], dtype=np.int32)
+        self.type_MEM = np.array([0] + [t['MEM'] for t in types], dtype=np.int32)
+        self.type_STO = np.array([0] + [t['STO'] for t in types], dtype=np.int32)
+        self.type_R = np.array([0] + [t['R'] for t in types], dtype=np.float32)  # same dtype as dist
+        self.type_base_cost = np.array([0] + [t['base_cost'] for t in types], dtype=float)
+        # coverage radii sorted ascending; types_R_first[k] is the first type (0-based, list order)
+        # whose radius is >= types_R_sorted[k], so searchsorted finds the type covering a distance
+        self.types_R_order = np.argsort(self.type_R[1:], kind='stable')
+        self.types_R_sorted = self.type_R[1:][self.types_R_order]
+        self.types_R_first = np.minimum.accumulate(self.types_R_order[::-1])[::-1]
+
+        # index vectors and bincount buffers reused by evaluate_batch (grown on demand)
+        self._devs = np.arange(self.E)
+        self._locs = np.arange(self.P)
+        self._bin_offsets = np.zeros((0, 1), dtype=int)
+        self._tiled_dem = np.zeros((3, 0))
+        self._placement_cost_c = np.ascontiguousarray(self.placement_cost, dtype=float)
 
     def decode_solution(self, place_loc, assign_dev):
         """
@@ -42,71 +78,25 @@ class CloudletProblem:
         Returns tuple (cost, latency, total_penalty, combined_fitness)
         Combined fitness minimized: latency + lambda * cost + penalty.
         We'll return both objectives and a scalar "fitness" used by the hybrid algorithm.
+        Accepts any int sequences; hot loops should call evaluate_batch with int arrays.
         """
         place_loc = np.asarray(place_loc, dtype=int)
         assign_dev = np.asarray(assign_dev, dtype=int)
+        r = self.evaluate_batch(place_loc[None, :], assign_dev[None, :], penalty_coeff)
+        return {k: float(v[0]) for k, v in r.items()}
 
-        # placement cost
-        placement_total = 0.0
-        for p in range(self.P):
-            c = place_loc[p]
-            if c > 0:
-                placement_total += self.placement_cost[c-1, p]  # c stored as 1-based index
-
-        # latency = sum distance of device to assigned location
-        lat = 0.0
-        for e in range(self.E):
-            p = assign_dev[e]
-            if p < 0 or p >= self.P:
-                lat += 1e6
-            else:
-                lat += float(self.dist[e, p])
-
-        # Constraint checks and penalty
-        penalty = 0.0
-
-        # 1) coverage: device assigned to location must be within coverage radius
-        for e in range(self.E):
-            p = assign_dev[e]
-            if p < 0 or p >= self.P:
-                penalty += 1e5
-            else:
-                c = place_loc[p]
-                if c == 0:
-                    penalty += 1e5
-                else:
-                    # cloudlet type c-1
-                    radius = self.cloudlet_types[c-1]['R']
-                    if self.dist[e, p] > radius + 1e-9:
-                        penalty += 1e5
-
-        # 2) capacity: sum of demands of devices assigned to p must be <= cloudlet capacity
-        # accumulate per p
-        cpu_used = np.zeros(self.P)
-        mem_used = np.zeros(self.P)
-        sto_used = np.zeros(self.P)
-        for e in range(self.E):
-            p = assign_dev[e]
-            if 0 <= p < self.P:
-                d = self.demands[e]
-                cpu_used[p] += d['cpu']
-                mem_used[p] += d['mem']
-                sto_used[p] += d['sto']
-
-        for p in range(self.P):
-            c = place_loc[p]
-            if c == 0:
-                # if resources used but no cloudlet placed -> penalty
-                if cpu_used[p] > 0 or mem_used[p] > 0 or sto_used[p] > 0:
-                    penalty += 1e6
-            else:
-                t = self.cloudlet_types[c-1]
-                if cpu_used[p] > t['CPU'] + 1e-9:
-                    penalty += (cpu_used[p] - t['CPU']) * 1e4
-                if mem_used[p] > t['MEM'] + 1e-9:
-                    penalty += (mem_used[p] - t['MEM']) * 1e4
-                if sto_used[p] > t['STO'] + 1e-9:
-                    penalty += (sto_used[p] - t['STO']) * 1e4
+    def evaluate_batch(self, place, assign, penalty_coeff=1e6):
+        """
+        Vectorized evaluate over a population.
+        place: int array (n,P), assign: int array (n,E), one solution per row.
+        Returns dict of arrays (n,) with the same keys as evaluate().
+        Inputs are used as-is (no conversion); callers must pass integer ndarrays.
+        """
+        assert place.dtype.kind in 'iu' and assign.dtype.kind in 'iu'
+        if evaluate_c is not None:
+            placement_total, lat, penalty = self._objectives_c(place, assign)
+        else:
+            placement_total, lat, penalty = self._objectives_numpy(place, assign)
 
         # Combined fitness for scalar optimization
         # weight cost vs latency
@@ -121,135 +111,203 @@ class CloudletProblem:
             'fitness': fitness
         }
 
-    def random_solution(self, max_active_locations=None):
+    def _objectives_c(self, place, assign):
+        """
+        (placement_cost, latency, penalty) arrays (n,) from the compiled kernel.
+        """
+        # the kernel runs without bounds checks: reject cloudlet types the NumPy path would index out of range
+        if place.size and (place.min() < 0 or place.max() > self.T):
+            raise IndexError(f"place values must be in 0..{self.T}")
+        n = len(place)
+        out = np.empty((n, 3))
+        used = np.empty((n, 3, self.P))
+        evaluate_c(np.ascontiguousarray(place, dtype=np.int64), np.ascontiguousarray(assign, dtype=np.int64),
+                   self.dist, self._dem_weights, self.type_CPU, self.type_MEM, self.type_STO, self.type_R,
+                   self._placement_cost_c, used, out)
+        return out[:, 0], out[:, 1], out[:, 2]
+
+    def _objectives_numpy(self, place, assign):
+        """
+        (placement_cost, latency, penalty) arrays (n,) computed with whole-array NumPy ops.
+        """
+        n = len(place)
+        devs = self._devs
+        locs = self._locs
+
+        # placement cost (c stored as 1-based index)
+        placed = place > 0
+        placement_total = np.where(placed, self.placement_cost[np.maximum(place - 1, 0), locs], 0.0).sum(axis=1)
+
+        # out-of-range assignments are penalized; index them as location 0 meanwhile
+        in_range = (assign >= 0) & (assign < self.P)
+        all_in_range = in_range.all()
+        assigned = assign if all_in_range else np.where(in_range, assign, 0)
+
+        # latency = sum distance of device to assigned location
+        dist_assigned = self.dist[devs, assigned]  # (n,E)
+        if all_in_range:
+            lat = dist_assigned.sum(axis=1, dtype=float)
+        else:
+            lat = np.where(in_range, dist_assigned, 0).sum(axis=1, dtype=float) + 1e6 * (~in_range).sum(axis=1)
+
+        # Constraint checks and penalty
+
+        # 1) coverage: device assigned to location must be within coverage radius
+        ctype = np.take_along_axis(place, assigned, axis=1)
+        cover_viol = ~in_range | (ctype == 0) | (dist_assigned > self.type_R[ctype])
+        penalty = 1e5 * cover_viol.sum(axis=1)
+
+        # 2) capacity: sum of demands of devices assigned to p must be <= cloudlet capacity
+        # one bincount over all rows: row i uses bins [i*P, (i+1)*P)
+        offsets, tiled_dem = self._batch_buffers_for(n)
+        bins = (assigned + offsets).ravel()
+        def used_by(w):
+            if not all_in_range:
+                w = np.where(in_range.ravel(), w, 0)
+            return np.bincount(bins, weights=w, minlength=n * self.P).reshape(n, self.P)
+        cpu_used = used_by(tiled_dem[0])
+        mem_used = used_by(tiled_dem[1])
+        sto_used = used_by(tiled_dem[2])
+
+        # resources used but no cloudlet placed -> penalty (demands are non-negative)
+        penalty += 1e6 * (~placed & (cpu_used + mem_used + sto_used > 0)).sum(axis=1)
+
+        over = (np.maximum(0, cpu_used - self.type_CPU[place]) +
+                np.maximum(0, mem_used - self.type_MEM[place]) +
+                np.maximum(0, sto_used - self.type_STO[place]))
+        penalty += 1e4 * np.where(placed, over, 0).sum(axis=1)
+
+        return placement_total, lat, penalty
+
+    def resource_usage(self, assign_dev):
+        """
+        Per-location (cpu, mem, sto) demand totals for an in-range assignment vector.
+        """
+        w_cpu, w_mem, w_sto = self._dem_weights
+        return (np.bincount(assign_dev, weights=w_cpu, minlength=self.P),
+                np.bincount(assign_dev, weights=w_mem, minlength=self.P),
+                np.bincount(assign_dev, weights=w_sto, minlength=self.P))
+
+    def _batch_buffers_for(self, n):
+        """
+        Row bin offsets (n,1) and the demands tiled n times (3, n*E) for batch size n,
+        as views of buffers sized for the largest batch seen so far.
+        """
+        if len(self._bin_offsets) < n:
+            self._bin_offsets = self.P * np.arange(n)[:, None]
+            self._tiled_dem = np.tile(self._dem_weights, n)
+        return self._bin_offsets[:n], self._tiled_dem[:, :n * self.E]
+
+    def random_solution(self, max_active_locations=None, rng=None):
         """
         Create a feasible-ish random solution:
         - Randomly choose some locations to place cloudlets and a type for each.
         - For each device, assign to nearest location that can host it (w/ radius), else random location.
+        rng: np.random.Generator (a fresh unseeded one if None)
         """
+        if rng is None:
+            rng = np.random.default_rng()
         if max_active_locations is None:
             max_active_locations = max(1, self.P // 4)
 
         place_loc = np.zeros(self.P, dtype=int)
-        active_count = np.random.randint(1, max_active_locations+1)
-        loc_indices = np.random.choice(self.P, size=active_count, replace=False)
+        active_count = rng.integers(1, max_active_locations+1)
+        loc_indices = rng.choice(self.P, size=active_count, replace=False)
         for p in loc_indices:
             # pick cloudlet type randomly
-            t = np.random.randint(0, self.T)
+            t = rng.integers(0, self.T)
             place_loc[p] = t + 1
 
         # assign each device to nearest active location that covers it, else nearest location
-        assign_dev = np.zeros(self.E, dtype=int)
-        for e in range(self.E):
-            candidates = []
-            for p in range(self.P):
-                c = place_loc[p]
-                if c > 0:
-                    radius = self.cloudlet_types[c-1]['R']
-                    if self.dist[e, p] <= radius:
-                        candidates.append(p)
-            if len(candidates) == 0:
-                # no covering location -> assign to nearest location (will be penalized)
-                assign_dev[e] = int(np.argmin(self.dist[e, :]))
-            else:
-                assign_dev[e] = int(np.random.choice(candidates))
+        radius_at = np.where(place_loc > 0, self.type_R[place_loc], -1.0)
+        cover = self.dist <= radius_at[None, :]  # (E,P)
+        # uniform random pick among covering locations: argmax of random priorities over the mask
+        priority = np.where(cover, rng.random((self.E, self.P)), -1.0)
+        # no covering location -> assign to nearest location (will be penalized)
+        assign_dev = np.where(cover.any(axis=1), priority.argmax(axis=1), self.nearest_loc)
         return place_loc, assign_dev
 
-    def repair_solution(self, place_loc, assign_dev):
+    def repair_solution(self, place_loc, assign_dev, rng=None):
         """
         Attempt to repair easy violations:
         - If a device is assigned to p where place_loc[p]==0 or distance>radius, reassign to nearest feasible p.
         - If capacity violated at a p, try to move some devices out to other feasible locations.
         This is greedy and not guaranteed to fully fix everything, but helps.
+        rng: np.random.Generator (a fresh unseeded one if None)
         """
+        if rng is None:
+            rng = np.random.default_rng()
         place_loc = place_loc.copy()
         assign_dev = assign_dev.copy()
+        devs = np.arange(self.E)
 
-        # precompute per-device feasible locations (given current placements)
-        feasible = [[] for _ in range(self.E)]
-        for e in range(self.E):
-            for p in range(self.P):
-                c = place_loc[p]
-                if c > 0:
-                    if self.dist[e, p] <= self.cloudlet_types[c-1]['R']:
-                        feasible[e].append(p)
+        # per-device feasible locations (given current placements) as a bool matrix (E,P)
+        radius_at = np.where(place_loc > 0, self.type_R[place_loc], -1.0)
+        feasible = self.dist <= radius_at[None, :]
 
         # fix assignments where not feasible
-        for e in range(self.E):
-            p = assign_dev[e]
-            if p < 0 or p >= self.P or (p not in feasible[e]):
-                if len(feasible[e]) > 0:
-                    assign_dev[e] = int(np.random.choice(feasible[e]))
-                else:
-                    # try to place a small cloudlet at nearest location to cover it
-                    near_p = int(np.argmin(self.dist[e, :]))
-                    # pick smallest cloudlet type that can cover (radius)
-                    chosen = None
-                    for t_idx, t in enumerate(self.cloudlet_types):
-                        if self.dist[e, near_p] <= t['R']:
-                            chosen = t_idx
-                            break
-                    if chosen is not None:
-                        place_loc[near_p] = chosen + 1
-                        assign_dev[e] = near_p
-                        feasible[e].append(near_p)
-                    else:
-                        # leave assignment to nearest location (will be penalized)
-                        assign_dev[e] = near_p
+        in_range = (assign_dev >= 0) & (assign_dev < self.P)
+        ok = in_range & feasible[devs, np.where(in_range, assign_dev, 0)]
+        bad = np.flatnonzero(~ok)
+        has_feasible = feasible[bad].any(axis=1)
+
+        # uniform random pick among feasible locations: argmax of random priorities over the mask
+        fix = bad[has_feasible]
+        priority = np.where(feasible[fix], rng.random((len(fix), self.P)), -1.0)
+        assign_dev[fix] = priority.argmax(axis=1)
+
+        # try to place a small cloudlet at nearest location to cover the remaining devices
+        uncovered = bad[~has_feasible]
+        near = self.nearest_loc[uncovered]
+        # pick the first cloudlet type (list order) whose radius covers the device
+        k = np.searchsorted(self.types_R_sorted, self.nearest_dist[uncovered], side='left')
+        for e, near_p, ki in zip(uncovered, near, k):
+            if ki < self.T:
+                place_loc[near_p] = self.types_R_first[ki] + 1
+                feasible[e, near_p] = True
+            # otherwise leave assignment to nearest location (will be penalized)
+            assign_dev[e] = near_p
 
         # capacity fix: for overloaded locations, move devices
-        def capacity_of(p):
-            c = place_loc[p]
-            if c == 0:
-                return (0,0,0)
-            t = self.cloudlet_types[c-1]
-            return (t['CPU'], t['MEM'], t['STO'])
-
-        # iterate a few times to try repair
-        for _ in range(3):
-            cpu_used = np.zeros(self.P)
-            mem_used = np.zeros(self.P)
-            sto_used = np.zeros(self.P)
-            for e in range(self.E):
-                p = assign_dev[e]
-                if 0 <= p < self.P:
-                    d = self.demands[e]
-                    cpu_used[p] += d['cpu']
-                    mem_used[p] += d['mem']
-                    sto_used[p] += d['sto']
-
-            moved = False
-            for p in range(self.P):
-                c = place_loc[p]
-                if c == 0: continue
-                cap_cpu, cap_mem, cap_sto = capacity_of(p)
-                over_cpu = cpu_used[p] - cap_cpu
-                over_mem = mem_used[p] - cap_mem
-                over_sto = sto_used[p] - cap_sto
-                if over_cpu > 0 or over_mem > 0 or over_sto > 0:
-                    # move some devices assigned to p to other feasible locations
-                    assigned_devices = [e for e in range(self.E) if assign_dev[e] == p]
-                    # sort assigned devices by "heaviest" resource (sum)
-                    assigned_devices.sort(key=lambda e: self.demands[e]['cpu']+self.demands[e]['mem']+self.demands[e]['sto'], reverse=True)
-                    for e in assigned_devices:
-                        # find alternative feasible location for e (other than p)
-                        alt = [pp for pp in feasible[e] if pp != p]
-                        if len(alt) == 0:
-                            continue
-                        # choose nearest alt
-                        alt.sort(key=lambda pp: self.dist[e, pp])
-                        newp = alt[0]
+        cap_cpu = self.type_CPU[place_loc].tolist()
+        cap_mem = self.type_MEM[place_loc].tolist()
+        cap_sto = self.type_STO[place_loc].tolist()
+        # "heaviest" resource (sum) decides which devices leave an overloaded location first
+        load = self.cpu_dem + self.mem_dem + self.sto_dem
+
+        # single pass over the overloaded locations, worst overflow first; usage is updated
+        # incrementally (plain lists: scalar updates). A device only moves to a location that
+        # still has room for all its demands, so moves never create new overloads and each
+        # location needs visiting once.
+        cpu_used, mem_used, sto_used = (u.tolist() for u in self.resource_usage(assign_dev))
+        cpu_dem, mem_dem, sto_dem = self.cpu_dem.tolist(), self.mem_dem.tolist(), self.sto_dem.tolist()
+        # feasible locations as distances (inf where infeasible), to try nearest alternatives first
+        feasible_dist = np.where(feasible, self.dist, np.inf)
+        def overflow(p):
+            return (max(0, cpu_used[p] - cap_cpu[p]) + max(0, mem_used[p] - cap_mem[p]) +
+                    max(0, sto_used[p] - cap_sto[p]))
+
+        overloaded = [p for p in np.flatnonzero(place_loc > 0).tolist() if overflow(p) > 0]
+        for p in sorted(overloaded, key=overflow, reverse=True):
+            # move some devices assigned to p to other feasible locations
+            assigned_devices = np.flatnonzero(assign_dev == p)
+            assigned_devices = assigned_devices[np.argsort(-load[assigned_devices], kind='stable')]
+            # alternative feasible locations (other than p) of each of them, nearest first
+            alt_dist = feasible_dist[assigned_devices]
+            alt_dist[:, p] = np.inf
+            alt_order = np.argsort(alt_dist, axis=1, kind='stable').tolist()
+            n_alt = np.isfinite(alt_dist).sum(axis=1).tolist()
+            for e, order, n in zip(assigned_devices.tolist(), alt_order, n_alt):
+                ce, me, se = cpu_dem[e], mem_dem[e], sto_dem[e]
+                for newp in order[:n]:
+                    if (cpu_used[newp] + ce <= cap_cpu[newp] and mem_used[newp] + me <= cap_mem[newp]
+                            and sto_used[newp] + se <= cap_sto[newp]):
                         # move e
-                        d = self.demands[e]
-                        cpu_used[p] -= d['cpu']; mem_used[p] -= d['mem']; sto_used[p] -= d['sto']
-                        cpu_used[newp] += d['cpu']; mem_used[newp] += d['mem']; sto_used[newp] += d['sto']
+                        cpu_used[p] -= ce; mem_used[p] -= me; sto_used[p] -= se
+                        cpu_used[newp] += ce; mem_used[newp] += me; sto_used[newp] += se
                         assign_dev[e] = newp
-                        moved = True
-                        # update over flags
-                        cap_cpu_p = cap_cpu
-                        if cpu_used[p] <= cap_cpu and mem_used[p] <= cap_mem and sto_used[p] <= cap_sto:
-                            break
-            if not moved:
-                break
+                        break
+                if overflow(p) <= 0:
+                    break
 
         return place_loc, assign_dev